@@ -510,36 +510,39 @@ def main():
 
     print("=" * 50)
 
-    # Run with provided task or enter interactive mode
-    if args.task:
-        print(f"\nTask: {args.task}\n")
-        result = agent.run(args.task)
-        print(f"\nResult: {result}")
-    else:
-        # Interactive mode
-        print("\nEntering interactive mode. Type 'quit' to exit.\n")
+    try:
+        # Run with provided task or enter interactive mode
+        if args.task:
+            print(f"\nTask: {args.task}\n")
+            result = agent.run(args.task)
+            print(f"\nResult: {result}")
+        else:
+            # Interactive mode
+            print("\nEntering interactive mode. Type 'quit' to exit.\n")
 
-        while True:
-            try:
-                task = input("Enter your task: ").strip()
+            while True:
+                try:
+                    task = input("Enter your task: ").strip()
 
-                if task.lower() in ("quit", "exit", "q"):
-                    print("Goodbye!")
-                    break
+                    if task.lower() in ("quit", "exit", "q"):
+                        print("Goodbye!")
+                        break
 
-                if not task:
-                    continue
+                    if not task:
+                        continue
 
-                print()
-                result = agent.run(task)
-                print(f"\nResult: {result}\n")
-                agent.reset()
+                    print()
+                    result = agent.run(task)
+                    print(f"\nResult: {result}\n")
+                    agent.reset()
 
-            except KeyboardInterrupt:
-                print("\n\nInterrupted. Goodbye!")
-                break
-            except Exception as e:
-                print(f"\nError: {e}\n")
+                except KeyboardInterrupt:
+                    print("\n\nInterrupted. Goodbye!")
+                    break
+                except Exception as e:
+                    print(f"\nError: {e}\n")
+    finally:
+        agent.close()
 
 
 if __name__ == "__main__":
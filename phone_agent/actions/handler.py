@@ -7,22 +7,23 @@ from dataclasses import dataclass
 from typing import Any, Callable
 
 from phone_agent.adb import (
+    ADB_KEYBOARD_IME,
     back,
-    clear_text,
     detect_and_set_adb_keyboard,
     double_tap,
     home,
     launch_app,
     long_press,
+    replace_text,
     restore_keyboard,
     swipe,
     tap,
-    type_text,
+    wait_for_ime,
 )
 from phone_agent.config.timing import TIMING_CONFIG
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ActionResult:
     """Result of an action execution."""
 
@@ -32,6 +33,22 @@ class ActionResult:
     requires_confirmation: bool = False
 
 
+# Shared result for the common "succeeded, keep going" case
+_RESULT_OK = ActionResult(True, False)
+
+# Leading verb of a model response: do(...) or finish(...)
+_VERB_RE = re.compile(r"(do|finish)\s*\(")
+
+# One keyword argument of a do(...) call. A value ends at the comma that starts
+# the next argument or at the closing parenthesis, so string values may contain
+# unescaped quotes and commas.
+_DO_ARG_RE = re.compile(
+    r'\s*(\w+)\s*=\s*(".*?"|\[[^\]]*\]|-?\d+(?:\.\d+)?|True|False|None)'
+    r"\s*(?:(,)(?=\s*\w+\s*=)|\)\s*\Z)",
+    re.DOTALL,
+)
+
+
 class ActionHandler:
     """
     Handles execution of actions from AI model output.
@@ -52,6 +69,26 @@ class ActionHandler:
         self.device_id = device_id
         self.confirmation_callback = confirmation_callback or self._default_confirmation
         self.takeover_callback = takeover_callback or self._default_takeover
+        # Original IME per device, kept until restored
+        self._ime_state: dict[str | None, str] = {}
+        # Devices on which ADB Keyboard is known to be active
+        self._adb_ime_active: set[str | None] = set()
+        self._handlers: dict[str, Callable] = {
+            "Launch": self._handle_launch,
+            "Tap": self._handle_tap,
+            "Type": self._handle_type,
+            "Type_Name": self._handle_type,
+            "Swipe": self._handle_swipe,
+            "Back": self._handle_back,
+            "Home": self._handle_home,
+            "Double Tap": self._handle_double_tap,
+            "Long Press": self._handle_long_press,
+            "Wait": self._handle_wait,
+            "Take_over": self._handle_takeover,
+            "Note": self._handle_note,
+            "Call_API": self._handle_call_api,
+            "Interact": self._handle_interact,
+        }
 
     def execute(
         self, action: dict[str, Any], screen_width: int, screen_height: int
@@ -82,7 +119,7 @@ class ActionHandler:
             )
 
         action_name = action.get("action")
-        handler_method = self._get_handler(action_name)
+        handler_method = self._handlers.get(action_name)
 
         if handler_method is None:
             return ActionResult(
@@ -98,32 +135,32 @@ class ActionHandler:
                 success=False, should_finish=False, message=f"Action failed: {e}"
             )
 
-    def _get_handler(self, action_name: str) -> Callable | None:
-        """Get the handler method for an action."""
-        handlers = {
-            "Launch": self._handle_launch,
-            "Tap": self._handle_tap,
-            "Type": self._handle_type,
-            "Type_Name": self._handle_type,
-            "Swipe": self._handle_swipe,
-            "Back": self._handle_back,
-            "Home": self._handle_home,
-            "Double Tap": self._handle_double_tap,
-            "Long Press": self._handle_long_press,
-            "Wait": self._handle_wait,
-            "Take_over": self._handle_takeover,
-            "Note": self._handle_note,
-            "Call_API": self._handle_call_api,
-            "Interact": self._handle_interact,
-        }
-        return handlers.get(action_name)
+    def restore_keyboards(self) -> None:
+        """
+        Restore the keyboards that were replaced by ADB Keyboard for typing.
+
+        Best effort: devices that cannot be reached keep ADB Keyboard active.
+        """
+        timing = TIMING_CONFIG.action
+        self._adb_ime_active.clear()
+        for device_id, original_ime in list(self._ime_state.items()):
+            try:
+                restore_keyboard(original_ime, device_id)
+                restored = wait_for_ime(
+                    device_id, original_ime, timeout=timing.keyboard_restore_delay
+                )
+            except Exception:
+                restored = False
+            # Keep devices that did not switch back so a later call retries
+            if restored:
+                del self._ime_state[device_id]
 
     def _convert_relative_to_absolute(
         self, element: list[int], screen_width: int, screen_height: int
     ) -> tuple[int, int]:
         """Convert relative coordinates (0-1000) to absolute pixels."""
-        x = int(element[0] / 1000 * screen_width)
-        y = int(element[1] / 1000 * screen_height)
+        x = int(element[0] * screen_width // 1000)
+        y = int(element[1] * screen_height // 1000)
         return x, y
 
     def _handle_launch(self, action: dict, width: int, height: int) -> ActionResult:
@@ -134,7 +171,7 @@ class ActionHandler:
 
         success = launch_app(app_name, self.device_id)
         if success:
-            return ActionResult(True, False)
+            return _RESULT_OK
         return ActionResult(False, False, f"App not found: {app_name}")
 
     def _handle_tap(self, action: dict, width: int, height: int) -> ActionResult:
@@ -143,7 +180,9 @@ class ActionHandler:
         if not element:
             return ActionResult(False, False, "No element coordinates")
 
-        x, y = self._convert_relative_to_absolute(element, width, height)
+        # Relative coordinates (0-1000) to pixels, inlined on this hot path
+        x = int(element[0] * width // 1000)
+        y = int(element[1] * height // 1000)
 
         # Check for sensitive operation
         if "message" in action:
@@ -155,28 +194,46 @@ class ActionHandler:
                 )
 
         tap(x, y, self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_type(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle text input action."""
         text = action.get("text", "")
 
-        # Switch to ADB keyboard
-        original_ime = detect_and_set_adb_keyboard(self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_switch_delay)
-
-        # Clear existing text and type new text
-        clear_text(self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_clear_delay)
+        # Switch to ADB keyboard (once per device until restored)
+        self._get_or_set_adb_ime(self.device_id)
 
-        type_text(text, self.device_id)
-        time.sleep(TIMING_CONFIG.action.text_input_delay)
-
-        # Restore original keyboard
-        restore_keyboard(original_ime, self.device_id)
-        time.sleep(TIMING_CONFIG.action.keyboard_restore_delay)
-
-        return ActionResult(True, False)
+        # Clear existing text and type new text in one shell round-trip; each
+        # broadcast returns once ADB Keyboard has handled it
+        try:
+            replace_text(text, self.device_id)
+        except Exception:
+            # The keyboard state is unknown; switch again next time, but keep
+            # the original IME so it is still restored at the end
+            self._adb_ime_active.discard(self.device_id)
+            raise
+
+        return _RESULT_OK
+
+    def _get_or_set_adb_ime(self, device_id: str | None) -> str:
+        """Switch to ADB Keyboard if not done yet and return the original IME."""
+        if device_id in self._adb_ime_active:
+            return self._ime_state[device_id]
+
+        current_ime = detect_and_set_adb_keyboard(device_id)
+        # After a failed Type the current IME may already be ADB Keyboard, so
+        # only the first detection counts as the original
+        original_ime = self._ime_state.setdefault(device_id, current_ime)
+        if not wait_for_ime(
+            device_id,
+            ADB_KEYBOARD_IME,
+            timeout=TIMING_CONFIG.action.keyboard_switch_delay,
+        ):
+            raise RuntimeError(
+                "ADB Keyboard did not become active; is it installed and enabled?"
+            )
+        self._adb_ime_active.add(device_id)
+        return original_ime
 
     def _handle_swipe(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle swipe action."""
@@ -186,21 +243,24 @@ class ActionHandler:
         if not start or not end:
             return ActionResult(False, False, "Missing swipe coordinates")
 
-        start_x, start_y = self._convert_relative_to_absolute(start, width, height)
-        end_x, end_y = self._convert_relative_to_absolute(end, width, height)
+        # Relative coordinates (0-1000) to pixels, inlined on this hot path
+        start_x = int(start[0] * width // 1000)
+        start_y = int(start[1] * height // 1000)
+        end_x = int(end[0] * width // 1000)
+        end_y = int(end[1] * height // 1000)
 
         swipe(start_x, start_y, end_x, end_y, device_id=self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_back(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle back button action."""
         back(self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_home(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle home button action."""
         home(self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_double_tap(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle double tap action."""
@@ -210,7 +270,7 @@ class ActionHandler:
 
         x, y = self._convert_relative_to_absolute(element, width, height)
         double_tap(x, y, self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_long_press(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle long press action."""
@@ -220,7 +280,7 @@ class ActionHandler:
 
         x, y = self._convert_relative_to_absolute(element, width, height)
         long_press(x, y, device_id=self.device_id)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_wait(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle wait action."""
@@ -231,29 +291,32 @@ class ActionHandler:
             duration = 1.0
 
         time.sleep(duration)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_takeover(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle takeover request (login, captcha, etc.)."""
         message = action.get("message", "User intervention required")
+        # Give the user their own keyboard back; the next Type switches again
+        self.restore_keyboards()
         self.takeover_callback(message)
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_note(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle note action (placeholder for content recording)."""
         # This action is typically used for recording page content
         # Implementation depends on specific requirements
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_call_api(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle API call action (placeholder for summarization)."""
         # This action is typically used for content summarization
         # Implementation depends on specific requirements
-        return ActionResult(True, False)
+        return _RESULT_OK
 
     def _handle_interact(self, action: dict, width: int, height: int) -> ActionResult:
         """Handle interaction request (user choice needed)."""
         # This action signals that user input is needed
+        self.restore_keyboards()
         return ActionResult(True, False, message="User interaction required")
 
     @staticmethod
@@ -283,14 +346,15 @@ def parse_action(response: str) -> dict[str, Any]:
     """
     try:
         response = response.strip()
-        if response.startswith('do(action="Type"') or response.startswith(
-            'do(action="Type_Name"'
-        ):
-            text = response.split("text=", 1)[1][1:-2]
-            action = {"_metadata": "do", "action": "Type", "text": text}
-            return action
-        elif response.startswith("do"):
-            # Use AST parsing instead of eval for safety
+        verb_match = _VERB_RE.match(response)
+        verb = verb_match.group(1) if verb_match else None
+
+        if verb == "do":
+            action = _scan_do_args(response, verb_match.end())
+            if action is not None:
+                return action
+
+            # Fall back to AST parsing (instead of eval) for unusual layouts
             try:
                 tree = ast.parse(response, mode="eval")
                 if not isinstance(tree.body, ast.Call):
@@ -308,7 +372,7 @@ def parse_action(response: str) -> dict[str, Any]:
             except (SyntaxError, ValueError) as e:
                 raise ValueError(f"Failed to parse do() action: {e}")
 
-        elif response.startswith("finish"):
+        elif verb == "finish":
             action = {
                 "_metadata": "finish",
                 "message": response.replace("finish(message=", "")[1:-2],
@@ -320,6 +384,29 @@ def parse_action(response: str) -> dict[str, Any]:
         raise ValueError(f"Failed to parse action: {e}")
 
 
+def _scan_do_args(response: str, pos: int) -> dict[str, Any] | None:
+    """Scan do(...) keyword arguments starting at pos, or None if they don't fit."""
+    action: dict[str, Any] = {"_metadata": "do"}
+    while True:
+        match = _DO_ARG_RE.match(response, pos)
+        if match is None:
+            return None
+
+        key, raw_value, separator = match.groups()
+        if raw_value.startswith('"'):
+            # Keep strings verbatim: model output is not escaped Python
+            action[key] = raw_value[1:-1]
+        else:
+            try:
+                action[key] = ast.literal_eval(raw_value)
+            except (SyntaxError, ValueError):
+                return None
+
+        if separator is None:
+            return action
+        pos = match.end()
+
+
 def do(**kwargs) -> dict[str, Any]:
     """Helper function for creating 'do' actions."""
     kwargs["_metadata"] = "do"
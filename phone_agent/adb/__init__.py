@@ -18,12 +18,17 @@ from phone_agent.adb.device import (
     tap,
 )
 from phone_agent.adb.input import (
+    ADB_KEYBOARD_IME,
     clear_text,
     detect_and_set_adb_keyboard,
+    get_current_ime,
+    replace_text,
     restore_keyboard,
     type_text,
+    wait_for_ime,
 )
 from phone_agent.adb.screenshot import get_screenshot
+from phone_agent.adb.shell import close_all_shells, close_shell, run_shell
 
 __all__ = [
     # Screenshot
@@ -31,8 +36,12 @@ __all__ = [
     # Input
     "type_text",
     "clear_text",
+    "replace_text",
     "detect_and_set_adb_keyboard",
     "restore_keyboard",
+    "get_current_ime",
+    "wait_for_ime",
+    "ADB_KEYBOARD_IME",
     # Device control
     "get_current_app",
     "tap",
@@ -42,6 +51,10 @@ __all__ = [
     "double_tap",
     "long_press",
     "launch_app",
+    # Shell sessions
+    "run_shell",
+    "close_shell",
+    "close_all_shells",
     # Connection management
     "ADBConnection",
     "DeviceInfo",
@@ -1,9 +1,19 @@
 """Input utilities for Android device text input."""
 
 import base64
-import subprocess
+import shlex
+import time
 from typing import Optional
 
+from phone_agent.adb.shell import run_shell
+
+ADB_KEYBOARD_IME = "com.android.adbkeyboard/.AdbIME"
+
+# Interval between polls while waiting for device state to settle (in seconds)
+_POLL_INTERVAL = 0.05
+
+_CLEAR_TEXT_COMMAND = "am broadcast -a ADB_CLEAR_TEXT"
+
 
 def type_text(text: str, device_id: str | None = None) -> None:
     """
@@ -17,24 +27,7 @@ def type_text(text: str, device_id: str | None = None) -> None:
         Requires ADB Keyboard to be installed on the device.
         See: https://github.com/nicnocquee/AdbKeyboard
     """
-    adb_prefix = _get_adb_prefix(device_id)
-    encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
-
-    subprocess.run(
-        adb_prefix
-        + [
-            "shell",
-            "am",
-            "broadcast",
-            "-a",
-            "ADB_INPUT_B64",
-            "--es",
-            "msg",
-            encoded_text,
-        ],
-        capture_output=True,
-        text=True,
-    )
+    run_shell(_type_text_command(text), device_id)
 
 
 def clear_text(device_id: str | None = None) -> None:
@@ -44,13 +37,23 @@ def clear_text(device_id: str | None = None) -> None:
     Args:
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = _get_adb_prefix(device_id)
+    run_shell(_CLEAR_TEXT_COMMAND, device_id)
+
+
+def replace_text(text: str, device_id: str | None = None) -> None:
+    """
+    Clear the currently focused input field and type new text into it.
 
-    subprocess.run(
-        adb_prefix + ["shell", "am", "broadcast", "-a", "ADB_CLEAR_TEXT"],
-        capture_output=True,
-        text=True,
-    )
+    Both steps run in a single shell round-trip.
+
+    Args:
+        text: The text to type.
+        device_id: Optional ADB device ID for multi-device setups.
+
+    Note:
+        Requires ADB Keyboard to be installed and active on the device.
+    """
+    run_shell(f"{_CLEAR_TEXT_COMMAND}\n{_type_text_command(text)}", device_id)
 
 
 def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
@@ -63,26 +66,14 @@ def detect_and_set_adb_keyboard(device_id: str | None = None) -> str:
     Returns:
         The original keyboard IME identifier for later restoration.
     """
-    adb_prefix = _get_adb_prefix(device_id)
-
     # Get current IME
-    result = subprocess.run(
-        adb_prefix + ["shell", "settings", "get", "secure", "default_input_method"],
-        capture_output=True,
-        text=True,
-    )
-    current_ime = (result.stdout + result.stderr).strip()
-
-    # Switch to ADB Keyboard if not already set
-    if "com.android.adbkeyboard/.AdbIME" not in current_ime:
-        subprocess.run(
-            adb_prefix + ["shell", "ime", "set", "com.android.adbkeyboard/.AdbIME"],
-            capture_output=True,
-            text=True,
-        )
-
-    # Warm up the keyboard
-    type_text("", device_id)
+    current_ime = get_current_ime(device_id)
+
+    # Switch to ADB Keyboard if not already set, then warm it up
+    script = _type_text_command("")
+    if ADB_KEYBOARD_IME not in current_ime:
+        script = f"ime set {ADB_KEYBOARD_IME}\n{script}"
+    run_shell(script, device_id)
 
     return current_ime
 
@@ -95,15 +86,46 @@ def restore_keyboard(ime: str, device_id: str | None = None) -> None:
         ime: The IME identifier to restore.
         device_id: Optional ADB device ID for multi-device setups.
     """
-    adb_prefix = _get_adb_prefix(device_id)
+    run_shell(f"ime set {shlex.quote(ime)}", device_id)
 
-    subprocess.run(
-        adb_prefix + ["shell", "ime", "set", ime], capture_output=True, text=True
-    )
 
+def get_current_ime(device_id: str | None = None) -> str:
+    """
+    Get the identifier of the currently selected keyboard IME.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+
+    Returns:
+        The IME identifier as reported by the device.
+    """
+    return run_shell("settings get secure default_input_method", device_id)
+
+
+def wait_for_ime(
+    device_id: str | None, expected_ime: str, timeout: float = 2.0
+) -> bool:
+    """
+    Wait until the given keyboard IME becomes the active one.
 
-def _get_adb_prefix(device_id: str | None) -> list:
-    """Get ADB command prefix with optional device specifier."""
-    if device_id:
-        return ["adb", "-s", device_id]
-    return ["adb"]
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+        expected_ime: The IME identifier to wait for.
+        timeout: Maximum time to wait in seconds.
+
+    Returns:
+        True if the IME became active before the timeout, False otherwise.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if expected_ime in get_current_ime(device_id):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(_POLL_INTERVAL)
+
+
+def _type_text_command(text: str) -> str:
+    """Build the ADB Keyboard broadcast command that types the given text."""
+    encoded_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+    return f"am broadcast -a ADB_INPUT_B64 --es msg {shlex.quote(encoded_text)}"
@@ -1,16 +1,23 @@
 """Screenshot utilities for capturing Android device screen."""
 
 import base64
-import os
+import queue
+import struct
 import subprocess
-import tempfile
-import uuid
+import threading
 from dataclasses import dataclass
 from io import BytesIO
 from typing import Tuple
 
 from PIL import Image
 
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Reusable buffers for raw screenshot data, sized for a typical PNG screenshot;
+# a buffer grows when a screenshot does not fit and is reused at its new size
+_BUFFER_SIZE = 2 * 1024 * 1024
+_buffer_pool: queue.SimpleQueue = queue.SimpleQueue()
+
 
 @dataclass
 class Screenshot:
@@ -37,44 +44,50 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
         If the screenshot fails (e.g., on sensitive screens like payment pages),
         a black fallback image is returned with is_sensitive=True.
     """
-    temp_path = os.path.join(tempfile.gettempdir(), f"screenshot_{uuid.uuid4()}.png")
     adb_prefix = _get_adb_prefix(device_id)
+    buf = _get_buffer()
 
     try:
-        # Execute screenshot command
-        result = subprocess.run(
-            adb_prefix + ["shell", "screencap", "-p", "/sdcard/tmp.png"],
-            capture_output=True,
-            text=True,
-            timeout=timeout,
+        # Stream the PNG straight from the device into a pooled buffer
+        process = subprocess.Popen(
+            adb_prefix + ["exec-out", "screencap", "-p"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
         )
-
-        # Check for screenshot failure (sensitive screen)
-        output = result.stdout + result.stderr
-        if "Status: -1" in output or "Failed" in output:
-            return _create_fallback_screenshot(is_sensitive=True)
-
-        # Pull screenshot to local temp path
-        subprocess.run(
-            adb_prefix + ["pull", "/sdcard/tmp.png", temp_path],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-
-        if not os.path.exists(temp_path):
+        timed_out = threading.Event()
+
+        def _kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            buf, size = _read_into(process.stdout, buf)
+            errors = process.stderr.read().decode("utf-8", errors="replace")
+            process.wait()
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            process.stderr.close()
+
+        if timed_out.is_set():
             return _create_fallback_screenshot(is_sensitive=False)
 
-        # Read and encode image
-        img = Image.open(temp_path)
-        width, height = img.size
+        with memoryview(buf) as view, view[:size] as data:
+            # Check for screenshot failure (sensitive screen); screencap errors
+            # may arrive on either stream
+            is_png = data[:8] == _PNG_SIGNATURE and data[-8:-4] == b"IEND"
+            if not is_png or process.returncode != 0:
+                output = bytes(data[:256]).decode("utf-8", errors="replace")
+                output += errors
+                is_sensitive = "Status: -1" in output or "Failed" in output
+                return _create_fallback_screenshot(is_sensitive=is_sensitive)
 
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        base64_data = base64.b64encode(buffered.getvalue()).decode("utf-8")
-
-        # Cleanup
-        os.remove(temp_path)
+            # Image size from the PNG IHDR chunk
+            width, height = struct.unpack(">II", data[16:24])
+            base64_data = base64.b64encode(data).decode("ascii")
 
         return Screenshot(
             base64_data=base64_data, width=width, height=height, is_sensitive=False
@@ -83,6 +96,34 @@ def get_screenshot(device_id: str | None = None, timeout: int = 10) -> Screensho
     except Exception as e:
         print(f"Screenshot error: {e}")
         return _create_fallback_screenshot(is_sensitive=False)
+    finally:
+        _put_buffer(buf)
+
+
+def _get_buffer() -> bytearray:
+    """Take a screenshot buffer from the pool, allocating one if it is empty."""
+    try:
+        return _buffer_pool.get_nowait()
+    except queue.Empty:
+        return bytearray(_BUFFER_SIZE)
+
+
+def _put_buffer(buf: bytearray) -> None:
+    """Return a screenshot buffer to the pool."""
+    _buffer_pool.put(buf)
+
+
+def _read_into(stream, buf: bytearray) -> tuple[bytearray, int]:
+    """Read a stream to EOF into buf, doubling it when full."""
+    size = 0
+    while True:
+        if size == len(buf):
+            buf.extend(bytes(len(buf)))
+        with memoryview(buf) as view:
+            count = stream.readinto(view[size:])
+        if not count:
+            return buf, size
+        size += count
 
 
 def _get_adb_prefix(device_id: str | None) -> list:
@@ -0,0 +1,154 @@
+"""Persistent ADB shell sessions for running device commands without respawning adb."""
+
+import queue
+import subprocess
+import threading
+import time
+import uuid
+
+
+class _ShellSession:
+    """A long-lived `adb shell` process fed through stdin."""
+
+    def __init__(self, device_id: str | None):
+        self.process = subprocess.Popen(
+            _get_adb_prefix(device_id) + ["shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+        )
+        self.lock = threading.Lock()
+        self._lines: queue.Queue[str | None] = queue.Queue()
+        # Read output on a background thread so reads can time out portably
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self) -> None:
+        for line in self.process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def run(self, script: str, timeout: float) -> str:
+        """Run a script and return its combined stdout/stderr."""
+        marker = f"__END_{uuid.uuid4().hex}__"
+        self.process.stdin.write(f"{script}\necho {marker}\n")
+        self.process.stdin.flush()
+
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                line = self._lines.get(timeout=max(remaining, 0))
+            except queue.Empty:
+                raise TimeoutError(f"ADB shell command timed out: {script!r}")
+            if line is None:
+                raise ConnectionError("ADB shell session closed")
+
+            line = line.rstrip("\r\n")
+            if line.endswith(marker):
+                output.append(line[: -len(marker)])
+                return "\n".join(output).strip()
+            output.append(line)
+
+    def close(self) -> None:
+        """Terminate the shell process and reap it."""
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        self.process.kill()
+        self.process.wait()
+
+
+_sessions: dict[str | None, _ShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def run_shell(script: str, device_id: str | None = None, timeout: float = 10.0) -> str:
+    """
+    Run a shell script on the device through a persistent `adb shell` session.
+
+    The session is opened on first use and reused by later calls for the same
+    device, which avoids spawning a new adb process per command. Calls for the
+    same device are serialized.
+
+    Args:
+        script: Shell commands to run, one per line.
+        device_id: Optional ADB device ID for multi-device setups.
+        timeout: Timeout in seconds for the script to complete.
+
+    Returns:
+        The combined stdout and stderr of the script, stripped.
+
+    Raises:
+        TimeoutError: If the script does not complete in time.
+        ConnectionError: If the shell session ends unexpectedly.
+    """
+    while True:
+        session = _get_session(device_id)
+        with session.lock:
+            # Another caller may have closed this session while we waited
+            with _sessions_lock:
+                is_current = _sessions.get(device_id) is session
+            if not is_current or session.process.poll() is not None:
+                continue
+
+            try:
+                return session.run(script, timeout)
+            except (TimeoutError, ConnectionError, OSError, ValueError):
+                # The session state is unknown; start a fresh one next time
+                _discard_session(device_id, session)
+                raise
+
+
+def close_shell(device_id: str | None = None) -> None:
+    """
+    Close the persistent shell session for a device, if one is open.
+
+    Args:
+        device_id: Optional ADB device ID for multi-device setups.
+    """
+    with _sessions_lock:
+        session = _sessions.pop(device_id, None)
+    if session is not None:
+        # Let a command already running on the session finish first
+        with session.lock:
+            session.close()
+
+
+def close_all_shells() -> None:
+    """Close the persistent shell sessions of all devices."""
+    with _sessions_lock:
+        device_ids = list(_sessions)
+    for device_id in device_ids:
+        close_shell(device_id)
+
+
+def _get_session(device_id: str | None) -> _ShellSession:
+    """Get the live session for a device, opening a new one if needed."""
+    with _sessions_lock:
+        session = _sessions.get(device_id)
+        if session is None or session.process.poll() is not None:
+            if session is not None:
+                session.close()
+            session = _sessions[device_id] = _ShellSession(device_id)
+        return session
+
+
+def _discard_session(device_id: str | None, session: _ShellSession) -> None:
+    """Close a session and unregister it unless it was already replaced."""
+    with _sessions_lock:
+        if _sessions.get(device_id) is session:
+            del _sessions[device_id]
+    session.close()
+
+
+def _get_adb_prefix(device_id: str | None) -> list:
+    """Get ADB command prefix with optional device specifier."""
+    if device_id:
+        return ["adb", "-s", device_id]
+    return ["adb"]
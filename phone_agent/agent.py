@@ -1,6 +1,7 @@
 """Main PhoneAgent class for orchestrating phone automation."""
 
 import json
+import threading
 import traceback
 import sys
 from dataclasses import dataclass
@@ -8,7 +9,7 @@ from typing import Any, Callable, List
 
 from phone_agent.actions import ActionHandler
 from phone_agent.actions.handler import do, finish, parse_action
-from phone_agent.adb import get_current_app, get_screenshot
+from phone_agent.adb import close_shell, get_current_app, get_screenshot
 from phone_agent.config import get_messages, get_system_prompt
 from phone_agent.model import ModelClient, ModelConfig
 from phone_agent.model.client import MessageBuilder
@@ -120,12 +121,16 @@ class PhoneAgent:
         print(message)
         self.verbose_handler.write(message)
 
-    def run(self, task: str) -> str:
+    def run(
+        self, task: str, cancel_event: threading.Event | None = None
+    ) -> str:
         """
         Run the agent to complete a task.
 
         Args:
             task: Natural language description of the task.
+            cancel_event: Optional event that stops the run before the next step
+                once set.
 
         Returns:
             Final message from the agent.
@@ -133,20 +138,29 @@ class PhoneAgent:
         self._context = []
         self._step_count = 0
 
-        # First step with user prompt
-        result = self._execute_step(task, is_first=True)
-
-        if result.finished:
-            return result.message or "Task completed"
+        try:
+            if cancel_event is not None and cancel_event.is_set():
+                return "Task stopped"
 
-        # Continue until finished or max steps reached
-        while self._step_count < self.agent_config.max_steps:
-            result = self._execute_step(is_first=False)
+            # First step with user prompt
+            result = self._execute_step(task, is_first=True)
 
             if result.finished:
                 return result.message or "Task completed"
 
-        return "Max steps reached"
+            # Continue until finished, stopped or max steps reached
+            while self._step_count < self.agent_config.max_steps:
+                if cancel_event is not None and cancel_event.is_set():
+                    return "Task stopped"
+
+                result = self._execute_step(is_first=False)
+
+                if result.finished:
+                    return result.message or "Task completed"
+
+            return "Max steps reached"
+        finally:
+            self.action_handler.restore_keyboards()
 
     def step(self, task: str | None = None) -> StepResult:
         """
@@ -171,6 +185,12 @@ class PhoneAgent:
         """Reset the agent state for a new task."""
         self._context = []
         self._step_count = 0
+        self.action_handler.restore_keyboards()
+
+    def close(self) -> None:
+        """Restore the device keyboard and close the agent's ADB shell session."""
+        self.action_handler.restore_keyboards()
+        close_shell(self.agent_config.device_id)
 
     def _execute_step(
         self, user_prompt: str | None = None, is_first: bool = False
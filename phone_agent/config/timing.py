@@ -12,11 +12,12 @@ from dataclasses import dataclass
 class ActionTimingConfig:
     """Configuration for action handler timing delays."""
 
-    # Text input related delays (in seconds)
-    keyboard_switch_delay: float = 1.0  # Delay after switching to ADB keyboard
-    text_clear_delay: float = 1.0  # Delay after clearing text
-    text_input_delay: float = 1.0  # Delay after typing text
-    keyboard_restore_delay: float = 1.0  # Delay after restoring original keyboard
+    # Text input related timeouts (in seconds); each wait ends as soon as
+    # the device reports the expected state
+    keyboard_switch_delay: float = 1.0  # Max wait for ADB keyboard to activate
+    text_clear_delay: float = 1.0  # Unused: clearing returns once the text is gone
+    text_input_delay: float = 1.0  # Unused: typing returns once the text is in
+    keyboard_restore_delay: float = 1.0  # Max wait for original keyboard to return
 
     def __post_init__(self):
         """Load values from environment variables if present."""
@@ -6,27 +6,35 @@ This module provides a web interface to manage automation tasks,
 including creating, editing, deleting, running, and stopping tasks.
 """
 
-import json
+import glob
 import os
 import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional
-from collections import deque
+from typing import Any, Dict, List, Optional
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from pydantic import dataclasses as pydantic_dataclasses
 
 from phone_agent import PhoneAgent
+from phone_agent.adb import close_all_shells
 from phone_agent.agent import AgentConfig
 from phone_agent.model import ModelConfig
 
-# Task models
-class TaskCreate(BaseModel):
+# Task models; stored tasks are slotted dataclasses to keep them small
+@pydantic_dataclasses.dataclass(slots=True, kw_only=True)
+class TaskCreate:
     name: str
     description: str
     base_url: str = "https://open.bigmodel.cn/api/paas/v4"
@@ -46,6 +54,7 @@ class TaskUpdate(BaseModel):
     max_steps: Optional[int] = None
     lang: Optional[str] = None
 
+@pydantic_dataclasses.dataclass(slots=True, kw_only=True)
 class TaskInfo(TaskCreate):
     id: str
     created_at: datetime
@@ -57,12 +66,72 @@ class TaskExecutionResponse(BaseModel):
     status: str
     message: str
 
+@dataclass(slots=True)
+class Execution:
+    """State of a single task execution."""
+    task_id: str
+    future: Optional[Future] = None
+    agent: Optional[PhoneAgent] = None
+    status: str = "pending"
+    result: Any = None
+    logs: List[str] = field(default_factory=list)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
 # Storage for tasks and executions
 tasks: Dict[str, TaskInfo] = {}
-executions: Dict[str, Dict] = {}  # execution_id -> {task_id, thread, agent, status, result, logs}
+executions: Dict[str, Execution] = {}
+# task_id -> ids of its pending or running executions, in start order
+_active_by_task: Dict[str, Dict[str, None]] = defaultdict(dict)
+_exec_lock = threading.Lock()  # guards executions, their fields and _active_by_task
+
+_task_adapter = TypeAdapter(TaskInfo)
+
+# Bounded pool of workers running task executions; extra executions queue up.
+# Created on startup so each app lifespan gets a fresh one.
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Idle agents kept for reuse so model clients and connections survive between runs
+AGENT_IDLE_TTL = 600  # seconds an idle agent is kept before being dropped
+_agent_pool: Dict[tuple, tuple] = {}  # (device_id, base_url, model, apikey, lang) -> (agent, last_used)
+_agent_pool_lock = threading.Lock()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load tasks and start the workers on startup; stop executions, save tasks and close devices on shutdown."""
+    global _executor
+    load_tasks()
+    _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="agent")
+    writer_stop = threading.Event()
+    writer = threading.Thread(target=_task_writer, args=(writer_stop,), name="task-writer", daemon=True)
+    writer.start()
+    yield
+    # Queued executions never start; running ones stop before their next step
+    with _exec_lock:
+        for task_id, execution_ids in list(_active_by_task.items()):
+            for execution_id in list(execution_ids):
+                execution = executions[execution_id]
+                if execution.future is not None and execution.future.cancel():
+                    _untrack_execution(task_id, execution_id)
+                execution.cancel_event.set()
+                execution.status = "stopped"
+    _executor.shutdown(wait=False, cancel_futures=True)
+    writer_stop.set()
+    _dirty.set()
+    writer.join()
+    with _agent_pool_lock:
+        pooled = [agent for agent, _ in _agent_pool.values()]
+        _agent_pool.clear()
+    for agent in pooled:
+        agent.close()
+    close_all_shells()
+    save_tasks()
 
 # Create FastAPI app
-app = FastAPI(title="Phone Agent Web UI", description="Web interface for managing phone automation tasks")
+app = FastAPI(
+    title="Phone Agent Web UI",
+    description="Web interface for managing phone automation tasks",
+    lifespan=lifespan,
+)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -76,39 +145,89 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Each task is stored in its own file so edits only rewrite the touched task
+TASKS_DIR = "tasks"
+# Single-file store used by older versions, migrated on load
+LEGACY_TASKS_FILE = "tasks.json"
+
+# Changes made within this window are coalesced into a single write (seconds)
+SAVE_DEBOUNCE_DELAY = 0.2
+
+_dirty = threading.Event()
+_dirty_tasks: set = set()
+_dirty_lock = threading.Lock()
+_save_lock = threading.Lock()
+
+def _task_path(task_id: str) -> str:
+    """Get the file path of a stored task."""
+    return os.path.join(TASKS_DIR, f"{task_id}.json")
+
 def load_tasks():
-    """Load tasks from file if exists."""
-    global tasks
-    if os.path.exists("tasks.json"):
-        with open("tasks.json", "r", encoding="utf-8") as f:
-            tasks_data = json.load(f)
-            for task_id, task_data in tasks_data.items():
-                # Convert datetime strings back to datetime objects
-                task_data['created_at'] = datetime.fromisoformat(task_data['created_at'])
-                task_data['updated_at'] = datetime.fromisoformat(task_data['updated_at'])
-                tasks[task_id] = TaskInfo(**task_data)
+    """Load tasks from disk, migrating the legacy tasks file if present."""
+    if os.path.isdir(TASKS_DIR):
+        for path in glob.glob(os.path.join(TASKS_DIR, "*.json")):
+            with open(path, "rb") as f:
+                task_data = orjson.loads(f.read())
+            tasks[task_data['id']] = _task_adapter.validate_python(task_data)
 
-def save_tasks():
-    """Save tasks to file."""
-    tasks_data = {}
-    for task_id, task in tasks.items():
-        tasks_data[task_id] = task.dict()
-        # Convert datetime objects to strings for JSON serialization
-        tasks_data[task_id]['created_at'] = tasks_data[task_id]['created_at'].isoformat()
-        tasks_data[task_id]['updated_at'] = tasks_data[task_id]['updated_at'].isoformat()
-    
-    with open("tasks.json", "w", encoding="utf-8") as f:
-        json.dump(tasks_data, f, ensure_ascii=False, indent=2)
+    if os.path.exists(LEGACY_TASKS_FILE):
+        with open(LEGACY_TASKS_FILE, "rb") as f:
+            tasks_data = orjson.loads(f.read())
+        for task_id, task_data in tasks_data.items():
+            if task_id not in tasks:
+                tasks[task_id] = _task_adapter.validate_python(task_data)
+                save_task(task_id, option=orjson.OPT_INDENT_2)
+        # Keep the old file around, but never load it again
+        os.replace(LEGACY_TASKS_FILE, LEGACY_TASKS_FILE + ".migrated")
 
-@app.on_event("startup")
-async def startup_event():
-    """Load tasks on startup."""
-    load_tasks()
+def save_task(task_id: str, option: int = 0):
+    """Write a single task to its file, or remove the file if the task is gone."""
+    path = _task_path(task_id)
+    with _save_lock:
+        task = tasks.get(task_id)
+        if task is None:
+            if os.path.exists(path):
+                os.remove(path)
+            return
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Save tasks on shutdown."""
-    save_tasks()
+        os.makedirs(TASKS_DIR, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(_task_adapter.dump_python(task, mode="json"), option=option))
+        os.replace(tmp_path, path)
+
+def _save_dirty_tasks(option: int = 0):
+    """Write all tasks changed since the last save."""
+    with _dirty_lock:
+        task_ids = list(_dirty_tasks)
+        _dirty_tasks.clear()
+    for task_id in task_ids:
+        save_task(task_id, option)
+
+def _task_writer(stop: threading.Event):
+    """Persist tasks in the background shortly after they change, until stopped."""
+    while True:
+        _dirty.wait()
+        if stop.is_set():
+            return
+        time.sleep(SAVE_DEBOUNCE_DELAY)
+        _dirty.clear()
+        try:
+            _save_dirty_tasks()
+        except Exception as e:
+            print(f"Failed to save tasks: {e}")
+
+def mark_task_dirty(task_id: str):
+    """Schedule a task to be saved by the background writer."""
+    with _dirty_lock:
+        _dirty_tasks.add(task_id)
+    _dirty.set()
+
+def save_tasks():
+    """Save all tasks to disk immediately, in readable form."""
+    with _dirty_lock:
+        _dirty_tasks.update(tasks.keys())
+    _save_dirty_tasks(option=orjson.OPT_INDENT_2)
 
 # Task Management APIs
 @app.get("/tasks", response_model=List[TaskInfo])
@@ -125,10 +244,10 @@ async def create_task(task: TaskCreate):
         id=task_id,
         created_at=now,
         updated_at=now,
-        **task.dict()
+        **asdict(task)
     )
     tasks[task_id] = task_info
-    save_tasks()
+    mark_task_dirty(task_id)
     return task_info
 
 @app.get("/tasks/{task_id}", response_model=TaskInfo)
@@ -145,12 +264,12 @@ async def update_task(task_id: str, task_update: TaskUpdate):
         raise HTTPException(status_code=404, detail="Task not found")
     
     # Update only provided fields
-    update_data = task_update.dict(exclude_unset=True)
+    update_data = task_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(tasks[task_id], field, value)
     
     tasks[task_id].updated_at = datetime.now()
-    save_tasks()
+    mark_task_dirty(task_id)
     return tasks[task_id]
 
 @app.delete("/tasks/{task_id}")
@@ -160,7 +279,7 @@ async def delete_task(task_id: str):
         raise HTTPException(status_code=404, detail="Task not found")
     
     del tasks[task_id]
-    save_tasks()
+    mark_task_dirty(task_id)
     return {"message": "Task deleted successfully"}
 
 # Task Execution APIs
@@ -180,19 +299,34 @@ class VerboseLogger:
         if len(self.logs) > 1000:
             self.logs.pop(0)
         # Also store in executions for API access
-        if self.execution_id in executions:
-            executions[self.execution_id]["logs"] = self.logs
+        with _exec_lock:
+            execution = executions.get(self.execution_id)
+            if execution is not None:
+                execution.logs = self.logs
     
     def get_logs(self) -> List[str]:
         """Get all logs"""
         return self.logs.copy()
 
-def run_task_execution(execution_id: str, task_info: TaskInfo):
-    """Run the task in a separate thread."""
-    try:
-        executions[execution_id]["status"] = "running"
-        executions[execution_id]["logs"] = []
-        
+def acquire_agent(task_info: TaskInfo):
+    """Take a pooled agent for the task's device and model, or create one."""
+    pool_key = (task_info.device_id, task_info.base_url, task_info.model, task_info.apikey, task_info.lang)
+    now = time.monotonic()
+    expired = []
+    with _agent_pool_lock:
+        # Drop agents that have been idle for too long
+        for key, (idle_agent, last_used) in list(_agent_pool.items()):
+            if now - last_used > AGENT_IDLE_TTL:
+                del _agent_pool[key]
+                expired.append(idle_agent)
+        entry = _agent_pool.pop(pool_key, None)
+    for idle_agent in expired:
+        idle_agent.close()
+    
+    if entry is not None:
+        agent = entry[0]
+        agent.reset()
+    else:
         # Create model and agent configs
         model_config = ModelConfig(
             base_url=task_info.base_url,
@@ -208,22 +342,64 @@ def run_task_execution(execution_id: str, task_info: TaskInfo):
             verbose=True  # Always enable verbose for web UI
         )
         
+        agent = PhoneAgent(model_config=model_config, agent_config=agent_config)
+    
+    agent.agent_config.max_steps = task_info.max_steps
+    return pool_key, agent
+
+def release_agent(pool_key: tuple, agent: PhoneAgent):
+    """Return an agent to the pool for reuse by later executions."""
+    with _agent_pool_lock:
+        _agent_pool[pool_key] = (agent, time.monotonic())
+
+def _untrack_execution(task_id: str, execution_id: str):
+    """Remove a finished execution from the active index; needs _exec_lock held."""
+    execution_ids = _active_by_task.get(task_id)
+    if execution_ids is not None:
+        execution_ids.pop(execution_id, None)
+        if not execution_ids:
+            del _active_by_task[task_id]
+
+def run_task_execution(execution_id: str, task_info: TaskInfo):
+    """Run the task on an executor worker thread."""
+    with _exec_lock:
+        execution = executions[execution_id]
+        if execution.status == "stopped":
+            # Stopped while still queued
+            _untrack_execution(execution.task_id, execution_id)
+            return
+        execution.status = "running"
+        execution.logs = []
+
+    try:
         # Custom logger for verbose output
         verbose_logger = VerboseLogger(execution_id)
         
-        # Create agent with verbose callback
-        agent = PhoneAgent(model_config=model_config, agent_config=agent_config)
+        # Reuse an idle agent for the same device and model, with verbose callback
+        pool_key, agent = acquire_agent(task_info)
         agent.verbose_handler.add_callback(verbose_logger.log)
-        executions[execution_id]["agent"] = agent
+        with _exec_lock:
+            execution.agent = agent
         
-        # Run the task
-        result = agent.run(task_info.description)
-        executions[execution_id]["result"] = result
-        executions[execution_id]["status"] = "completed"
+        try:
+            # Run the task on this executor worker
+            result = agent.run(task_info.description, cancel_event=execution.cancel_event)
+        finally:
+            agent.verbose_handler.remove_callback(verbose_logger.log)
+            release_agent(pool_key, agent)
+        with _exec_lock:
+            execution.result = result
+            if execution.status != "stopped":
+                execution.status = "completed"
         
     except Exception as e:
-        executions[execution_id]["result"] = str(e)
-        executions[execution_id]["status"] = "failed"
+        with _exec_lock:
+            execution.result = str(e)
+            execution.status = "failed"
+    
+    finally:
+        with _exec_lock:
+            _untrack_execution(execution.task_id, execution_id)
 
 @app.post("/tasks/{task_id}/execute", response_model=TaskExecutionResponse)
 async def execute_task(task_id: str):
@@ -235,23 +411,15 @@ async def execute_task(task_id: str):
     execution_id = str(uuid.uuid4())
     
     # Create execution record
-    executions[execution_id] = {
-        "task_id": task_id,
-        "thread": None,
-        "agent": None,
-        "status": "pending",
-        "result": None,
-        "logs": []
-    }
-    
-    # Start execution in a separate thread
-    execution_thread = threading.Thread(
-        target=run_task_execution,
-        args=(execution_id, task_info)
-    )
-    execution_thread.start()
+    execution = Execution(task_id=task_id)
+    with _exec_lock:
+        executions[execution_id] = execution
+        _active_by_task[task_id][execution_id] = None
     
-    executions[execution_id]["thread"] = execution_thread
+    # Queue execution on the worker pool
+    future = _executor.submit(run_task_execution, execution_id, task_info)
+    with _exec_lock:
+        execution.future = future
     
     return TaskExecutionResponse(
         task_id=task_id,
@@ -263,12 +431,22 @@ async def execute_task(task_id: str):
 @app.post("/tasks/{task_id}/stop", response_model=TaskExecutionResponse)
 async def stop_task(task_id: str):
     """Stop a running task."""
-    # Find running executions for this task
-    for execution_id, execution in executions.items():
-        if execution["task_id"] == task_id and execution["status"] == "running":
-            # Note: In a real implementation, we would need a more sophisticated way to stop the agent
-            # For now, we'll just mark it as stopped
-            execution["status"] = "stopped"
+    # Find the execution to stop: the running one first, else the oldest queued one
+    with _exec_lock:
+        active = [
+            (execution_id, executions[execution_id])
+            for execution_id in _active_by_task.get(task_id, ())
+            if executions[execution_id].status in ("pending", "running")
+        ]
+        active.sort(key=lambda item: item[1].status != "running")
+        if active:
+            execution_id, execution = active[0]
+            # Queued executions are cancelled before they start; running ones
+            # stop before their next step
+            if execution.future is not None and execution.future.cancel():
+                _untrack_execution(task_id, execution_id)
+            execution.cancel_event.set()
+            execution.status = "stopped"
             return TaskExecutionResponse(
                 task_id=task_id,
                 execution_id=execution_id,
@@ -281,17 +459,18 @@ async def stop_task(task_id: str):
 @app.get("/executions/{execution_id}")
 async def get_execution_status(execution_id: str):
     """Get the status of a task execution."""
-    if execution_id not in executions:
-        raise HTTPException(status_code=404, detail="Execution not found")
-    
-    execution = executions[execution_id]
-    return {
-        "execution_id": execution_id,
-        "task_id": execution["task_id"],
-        "status": execution["status"],
-        "result": execution["result"],
-        "logs": execution.get("logs", [])
-    }
+    with _exec_lock:
+        execution = executions.get(execution_id)
+        if execution is None:
+            raise HTTPException(status_code=404, detail="Execution not found")
+        
+        return {
+            "execution_id": execution_id,
+            "task_id": execution.task_id,
+            "status": execution.status,
+            "result": execution.result,
+            "logs": list(execution.logs)
+        }
 
 @app.get("/")
 async def read_index():